@@ -1,23 +1,67 @@
+import array
 import asyncio
+import codecs
 import json
 import logging
+import re
 import socket
+import struct
+import time
+from contextlib import AsyncExitStack
 from datetime import datetime
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, List, Callable, Union
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.typing import ConfigType
 from homeassistant.exceptions import ConfigEntryNotReady
 
 from .const import (
-    DOMAIN, PLATFORMS, MODBUS_DEVICE_ADDR_MIN, MODBUS_DEVICE_ADDR_MAX, 
+    DOMAIN, EVENT_NAME, EVENT_TEMPERATURE_DATA, PLATFORMS, MODBUS_DEVICE_ADDR_MIN, MODBUS_DEVICE_ADDR_MAX, 
     MODBUS_FUNCTION_CODE_READ, MODBUS_EXPECTED_LENGTH, OFFLINE_THRESHOLD, 
     HEARTBEAT_INDICATORS, REGISTRATION_INDICATORS, TEMPERATURE_SCALE, 
-    TEMPERATURE_MIN, TEMPERATURE_MAX, ERROR_CODES
+    TEMPERATURE_MIN, TEMPERATURE_MAX, ERROR_CODES, UDP_RECV_BUFFER_SIZE,
+    UDP_MAX_DATAGRAMS_PER_READ, UDP_SOCKET_RCVBUF, PENDING_MAX_PER_FLUSH,
+    UNKNOWN_PACKET_LOG_LIMIT
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+def _build_crc16_table() -> Tuple[int, ...]:
+    """预计算ModBus CRC16查找表（多项式0xA001）"""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ (-(crc & 1) & 0xA001)
+        table.append(crc)
+    return tuple(table)
+
+# CRC16查找表 - 模块加载时构建一次，每字节只需一次查表和异或
+_CRC16_TABLE = _build_crc16_table()
+
+# ModBus RTU帧最大长度：3字节头部 + 最多255字节数据 + 2字节CRC
+_MODBUS_MAX_FRAME_LENGTH = 260
+
+# 16位寄存器解码器 - 寄存器为大端序，CRC为小端序
+_U16_BE = struct.Struct('>H')
+_U16_LE = struct.Struct('<H')
+
+def _compile_indicators(indicators) -> "re.Pattern[str]":
+    """将指示符列表编译为忽略大小写的单个正则，一次扫描完成匹配"""
+    return re.compile('|'.join(map(re.escape, indicators)), re.IGNORECASE)
+
+# 文本数据包分类正则 - 心跳包优先于注册包
+_HEARTBEAT_RE = _compile_indicators(HEARTBEAT_INDICATORS)
+_REGISTRATION_RE = _compile_indicators(REGISTRATION_INDICATORS)
+_ALL_INDICATORS = tuple(HEARTBEAT_INDICATORS) + tuple(REGISTRATION_INDICATORS)
+
+# 文本解码顺序：gb2312 是 gbk 的子集、ascii 是 utf-8 的子集，无需单独尝试；
+# latin1 可解码任意字节，作为最终兜底
+_TEXT_ENCODINGS = ('utf-8', 'gbk', 'latin1')
+
+# 预先查找的解码函数，避免每个数据包重复查找编解码器
+_TEXT_DECODERS = tuple((encoding, codecs.lookup(encoding).decode) for encoding in _TEXT_ENCODINGS)
+
 # ================== 入口点函数 ==================
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
@@ -33,35 +77,40 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN] = {}
     
     port = entry.data.get("port", 8889)
+    # 接收缓冲区可在选项中修改，未设置时沿用创建条目时的配置
+    receive_buffer = entry.options.get(
+        "receive_buffer", entry.data.get("receive_buffer", UDP_SOCKET_RCVBUF)
+    )
     entry_id = entry.entry_id
     
     try:
         # 检查并清理已存在的实例
         await _cleanup_existing_instance(hass, entry_id, port)
         
-        # 检查端口可用性
-        _LOGGER.debug(f"检查端口 {port} 可用性...")
-        if not await _check_port_available(port):
-            _LOGGER.error(f"端口 {port} 被占用，无法启动服务")
-            raise ConfigEntryNotReady(f"端口 {port} 不可用")
-        _LOGGER.debug(f"端口 {port} 检查通过")
-        
-        # 创建并启动UDP服务器
-        udp_server = UDPTempServer(hass, port)
-        await udp_server.start()
-        
-        # 保存服务器实例
-        hass.data[DOMAIN][entry_id] = {
-            "server": udp_server,
-            "port": port,
-            "entry": entry
-        }
-        
-        # 注册服务
-        await _register_services(hass, udp_server)
-        
-        # 设置传感器平台
-        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+        async with AsyncExitStack() as stack:
+            # 创建并启动UDP服务器 - 端口被占用时由 start() 的重试机制处理；
+            # 后续任何步骤失败时退出上下文即会停止服务器
+            udp_server = await stack.enter_async_context(UDPTempServer(hass, port, receive_buffer))
+            
+            # 保存服务器实例 - 失败时由上下文一并移除
+            hass.data[DOMAIN][entry_id] = {
+                "server": udp_server,
+                "port": port,
+                "entry": entry
+            }
+            stack.callback(hass.data[DOMAIN].pop, entry_id, None)
+            
+            # 注册服务
+            await _register_services(hass, udp_server)
+            
+            # 设置传感器平台
+            await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+            
+            # 选项变更后重新加载条目，使新的接收缓冲区生效
+            entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+            
+            # 设置成功，服务器和数据改由 async_unload_entry 负责清理
+            stack.pop_all()
         
         _LOGGER.info(f"Temperature UDP Receiver 设置完成，端口: {port}")
         return True
@@ -70,11 +119,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         # 重新抛出ConfigEntryNotReady异常
         raise
     except Exception as e:
+        # 部分创建的资源已在退出 AsyncExitStack 时清理
         _LOGGER.error(f"设置 Temperature UDP Receiver 失败: {e}")
-        # 确保清理部分创建的资源
-        await _cleanup_failed_setup(hass, entry_id)
         raise ConfigEntryNotReady(f"设置失败: {e}")
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """选项更新后重新加载配置条目"""
+    _LOGGER.info(f"Temperature UDP Receiver 选项已更新，重新加载 (entry_id: {entry.entry_id})")
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """卸载配置条目 - 确保完全清理资源"""
     entry_id = entry.entry_id
@@ -140,50 +193,6 @@ async def _cleanup_existing_instance(hass: HomeAssistant, entry_id: str, port: i
     except Exception as e:
         _LOGGER.error(f"清理已存在实例时出错: {e}")
 
-async def _check_port_available(port: int) -> bool:
-    """检查端口是否可用"""
-    sock = None
-    try:
-        # 尝试绑定UDP端口
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        
-        # 尝试设置 SO_REUSEPORT（如果可用）
-        try:
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
-        except (AttributeError, OSError):
-            # SO_REUSEPORT 在某些系统上不可用，忽略
-            pass
-        
-        sock.bind(('0.0.0.0', port))
-        _LOGGER.debug(f"端口 {port} 可用")
-        return True
-        
-    except OSError as e:
-        _LOGGER.debug(f"端口 {port} 不可用: {e}")
-        return False
-    except Exception as e:
-        _LOGGER.error(f"检查端口可用性时出错: {e}")
-        return False
-    finally:
-        if sock:
-            try:
-                sock.close()
-            except:
-                pass
-
-async def _cleanup_failed_setup(hass: HomeAssistant, entry_id: str) -> None:
-    """清理失败的设置过程中创建的资源"""
-    try:
-        if DOMAIN in hass.data and entry_id in hass.data[DOMAIN]:
-            server_data = hass.data[DOMAIN].get(entry_id)
-            if server_data and "server" in server_data:
-                await server_data["server"].stop()
-            hass.data[DOMAIN].pop(entry_id, None)
-            _LOGGER.debug(f"已清理失败设置的资源: {entry_id}")
-    except Exception as e:
-        _LOGGER.error(f"清理失败设置资源时出错: {e}")
-
 # ================== 服务注册 ==================
 
 async def _register_services(hass: HomeAssistant, udp_server: 'UDPTempServer') -> None:
@@ -242,14 +251,29 @@ def _format_device_status_message(all_status: Dict[str, Dict[str, Any]]) -> str:
 class UDPTempServer:
     """UDP温度传感器服务器 - 增强版本，支持优雅重启"""
     
-    def __init__(self, hass: HomeAssistant, port: int):
+    __slots__ = (
+        'hass', 'port', 'receive_buffer', 'transport', 'protocol', '_sock', '_running', '_start_lock'
+    )
+    
+    def __init__(self, hass: HomeAssistant, port: int, receive_buffer: int = UDP_SOCKET_RCVBUF):
         self.hass = hass
         self.port = port
+        self.receive_buffer = receive_buffer
         self.transport = None
         self.protocol = None
+        self._sock = None
         self._running = False
         self._start_lock = asyncio.Lock()
         
+    async def __aenter__(self) -> 'UDPTempServer':
+        """进入上下文时启动服务器"""
+        await self.start()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        """退出上下文时停止服务器"""
+        await self.stop()
+    
     async def start(self) -> None:
         """启动UDP服务器，带重试机制"""
         async with self._start_lock:
@@ -265,26 +289,32 @@ class UDPTempServer:
                 try:
                     _LOGGER.debug(f"尝试启动UDP服务器，端口: {self.port} (尝试 {attempt + 1}/{max_retries})")
                     
-                    # 创建UDP套接字并设置重用选项
+                    # 创建UDP套接字 - 不设置 SO_REUSEADDR/SO_REUSEPORT，避免其他进程绑定同一端口分流数据包
                     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
                     
-                    # 在某些系统上需要设置 SO_REUSEPORT
-                    try:
-                        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
-                    except (AttributeError, OSError):
-                        # SO_REUSEPORT 在某些系统上不可用，忽略
-                        pass
+                    # 扩大内核接收缓冲区，突发数据包不会被内核静默丢弃
+                    self._set_receive_buffer(sock, self.receive_buffer)
                     
                     # 绑定到指定端口
                     sock.bind(('0.0.0.0', self.port))
                     
-                    # 使用预先配置的套接字创建数据报端点
-                    loop = asyncio.get_event_loop()
-                    self.transport, self.protocol = await loop.create_datagram_endpoint(
-                        lambda: UDPProtocol(self.hass),
-                        sock=sock
-                    )
+                    sock.setblocking(False)
+                    loop = self.hass.loop
+                    protocol = UDPProtocol(self.hass)
+                    
+                    try:
+                        # 直接注册可读回调，每次唤醒批量读取所有已到达的数据报
+                        loop.add_reader(sock.fileno(), self._drain_socket)
+                        self._sock = sock
+                    except NotImplementedError:
+                        # 事件循环不支持 add_reader（如 Windows Proactor），回退到数据报端点
+                        _LOGGER.debug("事件循环不支持 add_reader，使用数据报端点")
+                        self.transport, _ = await loop.create_datagram_endpoint(
+                            lambda: protocol,
+                            sock=sock
+                        )
+                    
+                    self.protocol = protocol
                     
                     self._running = True
                     _LOGGER.info(f"UDP服务器已启动，监听端口: {self.port}")
@@ -329,31 +359,27 @@ class UDPTempServer:
                 return
                 
             try:
+                if self._sock:
+                    _LOGGER.debug("正在关闭UDP套接字...")
+                    self.hass.loop.remove_reader(self._sock.fileno())
+                    self._sock.close()
+                
                 if self.transport:
                     _LOGGER.debug("正在关闭UDP传输...")
                     self.transport.close()
                     
-                    # 等待传输完全关闭
-                    max_wait = 5.0  # 最多等待5秒
-                    wait_time = 0.1
-                    total_waited = 0
-                    
-                    while not self.transport.is_closing() and total_waited < max_wait:
-                        await asyncio.sleep(wait_time)
-                        total_waited += wait_time
-                    
-                    if total_waited >= max_wait:
+                    # 等待 connection_lost 回调，确认套接字已真正关闭（最多5秒）
+                    try:
+                        await asyncio.wait_for(asyncio.shield(self.protocol.closed), 5.0)
+                        _LOGGER.debug("UDP传输已关闭")
+                    except asyncio.TimeoutError:
                         _LOGGER.warning("UDP传输关闭超时")
-                    else:
-                        _LOGGER.debug(f"UDP传输已关闭 (等待时间: {total_waited:.2f}s)")
                 
                 self.transport = None
                 self.protocol = None
+                self._sock = None
                 self._running = False
                 
-                # 额外等待，确保端口释放
-                await asyncio.sleep(0.5)
-                
                 _LOGGER.info(f"UDP服务器已停止，端口 {self.port} 已释放")
                 
             except Exception as e:
@@ -362,6 +388,40 @@ class UDPTempServer:
                 self._running = False
                 self.transport = None
                 self.protocol = None
+                self._sock = None
+    
+    @staticmethod
+    def _set_receive_buffer(sock: socket.socket, size: int) -> None:
+        """设置套接字接收缓冲区大小，并记录内核实际分配的大小"""
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, size)
+            granted = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+        except OSError as e:
+            _LOGGER.warning(f"设置UDP接收缓冲区失败: {e}")
+            return
+        
+        # Linux 会将请求值翻倍记账，并受 net.core.rmem_max 限制
+        if granted < size:
+            _LOGGER.info(f"UDP接收缓冲区受系统限制: 请求={size}, 实际={granted} 字节")
+        else:
+            _LOGGER.debug(f"UDP接收缓冲区大小: {granted} 字节")
+    
+    def _drain_socket(self) -> None:
+        """读取套接字中已到达的数据报，单次唤醒最多处理 UDP_MAX_DATAGRAMS_PER_READ 个"""
+        sock = self._sock
+        protocol = self.protocol
+        
+        for _ in range(UDP_MAX_DATAGRAMS_PER_READ):
+            try:
+                data, addr = sock.recvfrom(UDP_RECV_BUFFER_SIZE)
+            except (BlockingIOError, InterruptedError):
+                # 接收队列已读空
+                return
+            except OSError as e:
+                _LOGGER.debug("读取UDP数据报失败: %s", e)
+                return
+            
+            protocol.datagram_received(data, addr)
     
     def get_client_status(self) -> Dict[str, Any]:
         """获取客户端状态"""
@@ -372,65 +432,136 @@ class UDPTempServer:
     @property
     def is_running(self) -> bool:
         """检查服务器是否正在运行"""
-        return self._running and self.transport is not None
+        return self._running and (self._sock is not None or self.transport is not None)
 
 # ================== UDP协议处理器 ==================
 
 class UDPProtocol(asyncio.DatagramProtocol):
     """UDP协议处理器"""
     
+    __slots__ = (
+        'hass', '_client_index', '_client_types', '_last_seen', '_last_heartbeat',
+        '_last_registration', '_registration_data', '_modbus_parser', '_loop',
+        '_bus_fire', '_pending', '_unknown_window', '_unknown_count', 'closed'
+    )
+    
     def __init__(self, hass: HomeAssistant):
         self.hass = hass
-        self.known_clients: Dict[str, Dict[str, Any]] = {}
+        # 客户端状态按列存储：地址 -> 行索引，各字段为并列的数组
+        self._client_index: Dict[str, int] = {}
+        self._client_types: List[str] = []
+        self._last_seen = array.array('d')
+        self._last_heartbeat = array.array('d')
+        self._last_registration = array.array('d')
+        self._registration_data: List[Optional[str]] = []
         self._modbus_parser = ModBusParser()
-        
+        self._loop = hass.loop
+        self._bus_fire = hass.bus.async_fire
+        # 待处理的已解析数据包 - 在接收回调之外批量更新客户端状态并触发事件
+        self._pending: List[Tuple[Callable[..., None], Any, str, float]] = []
+        # 未知数据包日志限流 - 按秒计数
+        self._unknown_window = -1
+        self._unknown_count = 0
+        # 传输关闭时由 connection_lost 设置结果，供 UDPTempServer.stop 等待
+        self.closed: asyncio.Future = self._loop.create_future()
+        
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        """传输关闭回调"""
+        if not self.closed.done():
+            self.closed.set_result(None)
+    
     def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
         """接收并处理UDP数据包"""
         addr_str = f"{addr[0]}:{addr[1]}"
+        now = self._loop.time()
         
         # 详细的数据包日志
-        _LOGGER.info(f"收到UDP数据包 from {addr_str}: 长度={len(data)}字节")
-        _LOGGER.debug(f"原始数据 (hex): {data.hex()}")
-        _LOGGER.debug(f"原始数据 (bytes): {list(data)}")
+        _LOGGER.info("收到UDP数据包 from %s: 长度=%d字节", addr_str, len(data))
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("原始数据 (hex): %s", data.hex())
         
         try:
-            # 优先尝试解析ModBus数据
-            _LOGGER.debug(f"尝试解析ModBus数据...")
-            parsed_data = self._modbus_parser.parse(data)
-            if parsed_data:
-                _LOGGER.info(f"ModBus数据解析成功 from {addr_str}")
-                self._handle_temperature_data(parsed_data, addr_str)
-                return
+            # 优先尝试解析ModBus数据 - 先做廉价的长度/地址/功能码预检，文本包无需进入解析器
+            if (5 <= len(data) <= _MODBUS_MAX_FRAME_LENGTH
+                    and MODBUS_DEVICE_ADDR_MIN <= data[0] <= MODBUS_DEVICE_ADDR_MAX
+                    and data[1] == MODBUS_FUNCTION_CODE_READ):
+                _LOGGER.debug("尝试解析ModBus数据...")
+                temp_raw = self._modbus_parser.parse(data)
+                if temp_raw is not None:
+                    _LOGGER.info("ModBus数据解析成功 from %s", addr_str)
+                    self._defer(self._handle_temperature_data, temp_raw, addr_str, now)
+                    return
+                _LOGGER.debug("ModBus数据解析失败，尝试文本解析...")
             else:
-                _LOGGER.debug(f"ModBus数据解析失败，尝试文本解析...")
+                _LOGGER.debug("不符合ModBus帧特征，尝试文本解析...")
                 
             # 尝试解析文本数据
             text_data = self._try_decode_text(data)
             if text_data:
-                _LOGGER.debug(f"文本解码成功: '{text_data[:100]}{'...' if len(text_data) > 100 else ''}'")
-                if self._is_text_packet(text_data):
-                    _LOGGER.info(f"识别为文本数据包 from {addr_str}")
-                    self._handle_text_packet(text_data, addr_str)
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("文本解码成功: '%s%s'", text_data[:100], '...' if len(text_data) > 100 else '')
+                packet_type = self._classify_text(text_data)
+                if packet_type == 'heartbeat':
+                    _LOGGER.info("处理心跳包 from %s", addr_str)
+                    self._defer(self._handle_heartbeat, text_data, addr_str, now)
+                    return
+                elif packet_type == 'registration':
+                    _LOGGER.info("处理注册包 from %s", addr_str)
+                    self._defer(self._handle_registration, text_data, addr_str, now)
                     return
                 else:
-                    _LOGGER.debug(f"文本数据不符合已知格式")
+                    _LOGGER.debug("文本数据不符合已知格式")
             else:
-                _LOGGER.debug(f"文本解码失败")
+                _LOGGER.debug("文本解码失败")
             
-            # 所有解析方法都失败
-            _LOGGER.warning(f"无法解码UDP数据包 from {addr_str}")
-            _LOGGER.warning(f"数据详情: 长度={len(data)}, hex={data.hex()}, bytes={list(data)}")
+            # 所有解析方法都失败 - 每秒只记录有限数量，避免垃圾流量占用CPU和日志
+            window = int(now)
+            if window != self._unknown_window:
+                self._unknown_window = window
+                self._unknown_count = 0
+            self._unknown_count += 1
             
-            # 尝试识别数据包类型
-            self._analyze_unknown_packet(data, addr_str)
+            if self._unknown_count <= UNKNOWN_PACKET_LOG_LIMIT:
+                _LOGGER.warning("无法解码UDP数据包 from %s", addr_str)
+                _LOGGER.warning("数据详情: 长度=%d, hex=%s", len(data), data.hex())
+                
+                # 尝试识别数据包类型
+                self._analyze_unknown_packet(data, addr_str)
+            elif self._unknown_count == UNKNOWN_PACKET_LOG_LIMIT + 1:
+                _LOGGER.warning("未知数据包过多，本秒内不再记录详情 (上限: %d)", UNKNOWN_PACKET_LOG_LIMIT)
                 
         except Exception as e:
-            _LOGGER.error(f"处理UDP数据包失败 from {addr}: {e}")
-            _LOGGER.error(f"异常数据: hex={data.hex()}, bytes={list(data)}")
+            _LOGGER.error("处理UDP数据包失败 from %s: %s", addr, e)
+            _LOGGER.error("异常数据: hex=%s", data.hex())
+    
+    def _defer(self, handler: Callable[..., None], payload: Any, addr: str, now: float) -> None:
+        """将已解析的数据包加入待处理队列，同一轮事件循环内只调度一次处理"""
+        if not self._pending:
+            self._loop.call_soon(self._process_pending)
+        self._pending.append((handler, payload, addr, now))
+    
+    def _process_pending(self) -> None:
+        """处理队列中的数据包：更新客户端状态并触发事件，单轮最多处理 PENDING_MAX_PER_FLUSH 个"""
+        pending = self._pending
+        batch = pending[:PENDING_MAX_PER_FLUSH]
+        del pending[:PENDING_MAX_PER_FLUSH]
+        
+        # 剩余数据包留到下一轮，避免突发流量长时间占用事件循环
+        if pending:
+            self._loop.call_soon(self._process_pending)
+        
+        for handler, payload, addr, now in batch:
+            try:
+                handler(payload, addr, now)
+            except Exception as e:
+                _LOGGER.error("处理数据包失败 from %s: %s", addr, e)
     
     def _analyze_unknown_packet(self, data: bytes, addr_str: str) -> None:
-        """分析未知数据包格式"""
-        _LOGGER.debug(f"开始分析未知数据包格式 from {addr_str}")
+        """分析未知数据包格式 - 仅输出调试日志，未开启DEBUG时直接返回"""
+        if not _LOGGER.isEnabledFor(logging.DEBUG):
+            return
+        
+        _LOGGER.debug("开始分析未知数据包格式 from %s", addr_str)
         
         if len(data) == 0:
             _LOGGER.debug("空数据包")
@@ -445,20 +576,20 @@ class UDPProtocol(asyncio.DatagramProtocol):
         }
         
         if len(data) in common_lengths:
-            _LOGGER.debug(f"数据包长度 {len(data)}: {common_lengths[len(data)]}")
+            _LOGGER.debug("数据包长度 %d: %s", len(data), common_lengths[len(data)])
         
         # 分析前几个字节
         if len(data) >= 1:
-            _LOGGER.debug(f"第1字节 (设备地址?): 0x{data[0]:02X} ({data[0]})")
+            _LOGGER.debug("第1字节 (设备地址?): 0x%02X (%d)", data[0], data[0])
         if len(data) >= 2:
-            _LOGGER.debug(f"第2字节 (功能码?): 0x{data[1]:02X} ({data[1]})")
+            _LOGGER.debug("第2字节 (功能码?): 0x%02X (%d)", data[1], data[1])
         if len(data) >= 3:
-            _LOGGER.debug(f"第3字节 (数据长度?): 0x{data[2]:02X} ({data[2]})")
+            _LOGGER.debug("第3字节 (数据长度?): 0x%02X (%d)", data[2], data[2])
             
         # 检查是否包含可打印字符
         try:
             ascii_chars = ''.join(chr(b) if 32 <= b <= 126 else '.' for b in data)
-            _LOGGER.debug(f"ASCII表示: '{ascii_chars}'")
+            _LOGGER.debug("ASCII表示: '%s'", ascii_chars)
         except:
             pass
             
@@ -471,200 +602,206 @@ class UDPProtocol(asyncio.DatagramProtocol):
     
     def _try_decode_text(self, data: bytes) -> Optional[str]:
         """尝试多种编码解码文本数据"""
-        encodings = ['utf-8', 'gbk', 'gb2312', 'ascii', 'latin1']
+        # 心跳/注册包通常为纯ASCII，可直接解码，无需逐个尝试编码
+        if data.isascii():
+            return data.decode('ascii')
         
-        for encoding in encodings:
+        for encoding, decode in _TEXT_DECODERS:
             try:
-                decoded = data.decode(encoding)
-                _LOGGER.debug(f"使用 {encoding} 编码解码成功: '{decoded[:50]}{'...' if len(decoded) > 50 else ''}'")
+                decoded, _ = decode(data)
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("使用 %s 编码解码成功: '%s%s'", encoding, decoded[:50], '...' if len(decoded) > 50 else '')
                 return decoded
             except (UnicodeDecodeError, UnicodeError) as e:
-                _LOGGER.debug(f"使用 {encoding} 编码失败: {e}")
+                _LOGGER.debug("使用 %s 编码失败: %s", encoding, e)
                 continue
         
         _LOGGER.debug("所有编码方式都失败")
         return None
     
-    def _is_text_packet(self, data: str) -> bool:
-        """检查是否为文本数据包（心跳包或注册包）"""
-        data_lower = data.lower()
-        indicators = HEARTBEAT_INDICATORS + REGISTRATION_INDICATORS
-        
-        for indicator in indicators:
-            if indicator in data_lower:
-                _LOGGER.debug(f"匹配到指示符: '{indicator}'")
-                return True
-                
-        _LOGGER.debug(f"未匹配到任何指示符，支持的指示符: {indicators}")
-        return False
-    
-    def _handle_text_packet(self, data: str, addr: str) -> None:
-        """处理文本数据包"""
-        data_lower = data.lower()
-        
-        if any(indicator in data_lower for indicator in HEARTBEAT_INDICATORS):
-            _LOGGER.info(f"处理心跳包 from {addr}")
-            self._handle_heartbeat(data, addr)
-        elif any(indicator in data_lower for indicator in REGISTRATION_INDICATORS):
-            _LOGGER.info(f"处理注册包 from {addr}")
-            self._handle_registration(data, addr)
-        else:
-            _LOGGER.debug(f"收到未知文本数据包 from {addr}: {data[:50]}")
+    def _classify_text(self, data: str) -> Optional[str]:
+        """识别文本数据包类型，返回 'heartbeat'、'registration' 或 None"""
+        match = _HEARTBEAT_RE.search(data)
+        if match:
+            _LOGGER.debug("匹配到心跳指示符: '%s'", match.group(0))
+            return 'heartbeat'
+        
+        match = _REGISTRATION_RE.search(data)
+        if match:
+            _LOGGER.debug("匹配到注册指示符: '%s'", match.group(0))
+            return 'registration'
+        
+        _LOGGER.debug("未匹配到任何指示符，支持的指示符: %s", _ALL_INDICATORS)
+        return None
     
-    def _handle_temperature_data(self, temp_json: str, addr: str) -> None:
-        """处理温度数据"""
+    def _handle_temperature_data(self, temp_raw: int, addr: str, now: float) -> None:
+        """处理温度数据 - 直接由寄存器原始值构建事件数据"""
         try:
-            temp_data_obj = json.loads(temp_json)
-            temp_data = temp_data_obj.get('temperature', {})
+            parser = self._modbus_parser
+            temp_data = parser.build_temperature_data(temp_raw)
             
-            if not temp_data:
-                _LOGGER.warning(f"温度JSON中无temperature字段: {temp_json}")
-                return
-                
             # 更新客户端状态
-            self._update_client_status(addr, 'temperature_sensor')
+            self._update_client_status(addr, 'temperature_sensor', now)
             
             # 触发温度数据事件
             event_data = {
                 'event_type': 'temperature_data_received',
                 'temperature_data': temp_data,
-                'timestamp': temp_data_obj.get('timestamp'),
+                'timestamp': parser.get_timestamp(),
                 'source_addr': addr,
-                'device_type': temp_data_obj.get('device_type', '18B20')
+                'device_type': '18B20'
             }
             
-            self.hass.bus.async_fire(f'{DOMAIN}_event', event_data)
+            self._bus_fire(EVENT_TEMPERATURE_DATA, event_data)
             
             # 记录温度数据
-            temp_celsius = temp_data.get('celsius', 0)
-            temp_status = temp_data.get('status', 'unknown')
-            _LOGGER.info(f"温度数据更新 from {addr}: {temp_celsius:.1f}°C, 状态={temp_status}")
+            _LOGGER.info("温度数据更新 from %s: %.1f°C, 状态=%s", addr, temp_data['celsius'], temp_data['status'])
             
-        except json.JSONDecodeError as e:
-            _LOGGER.error(f"温度数据JSON解析失败 from {addr}: {e}")
-            _LOGGER.debug(f"失败的JSON数据: {temp_json}")
         except Exception as e:
-            _LOGGER.error(f"处理温度数据失败 from {addr}: {e}")
+            _LOGGER.error("处理温度数据失败 from %s: %s", addr, e)
     
-    def _handle_heartbeat(self, data: str, addr: str) -> None:
+    def _handle_heartbeat(self, data: str, addr: str, now: float) -> None:
         """处理心跳包"""
-        _LOGGER.debug(f"收到心跳包 from {addr}: '{data[:100]}'")
-        self._update_client_status(addr, 'heartbeat')
-        self._fire_event('device_heartbeat', {
+        _LOGGER.debug("收到心跳包 from %s: '%s'", addr, data[:100])
+        self._update_client_status(addr, 'heartbeat', now)
+        self._bus_fire(EVENT_NAME, {
+            'event_type': 'device_heartbeat',
+            'timestamp': now,
             'device_addr': addr,
             'heartbeat_data': data[:100]
         })
     
-    def _handle_registration(self, data: str, addr: str) -> None:
+    def _handle_registration(self, data: str, addr: str, now: float) -> None:
         """处理注册包"""
-        _LOGGER.info(f"收到设备注册 from {addr}: '{data[:100]}'")
-        self._update_client_status(addr, 'registration', {'registration_data': data})
-        self._fire_event('device_registered', {
+        _LOGGER.info("收到设备注册 from %s: '%s'", addr, data[:100])
+        idx = self._update_client_status(addr, 'registration', now)
+        self._registration_data[idx] = data
+        self._bus_fire(EVENT_NAME, {
+            'event_type': 'device_registered',
+            'timestamp': now,
             'device_addr': addr,
             'registration_data': data
         })
     
-    def _fire_event(self, event_type: str, event_data: Dict[str, Any]) -> None:
-        """触发事件的通用方法"""
-        event_data.update({
-            'event_type': event_type,
-            'timestamp': asyncio.get_event_loop().time()
-        })
-        self.hass.bus.async_fire(f'{DOMAIN}_event', event_data)
-    
-    def _update_client_status(self, addr: str, client_type: str, extra_data: Optional[Dict] = None) -> None:
-        """更新客户端状态"""
-        current_time = asyncio.get_event_loop().time()
-        
-        client_info = {
-            'last_seen': current_time,
-            'type': client_type
-        }
-        
-        if extra_data:
-            client_info.update(extra_data)
+    def _update_client_status(self, addr: str, client_type: str, now: float) -> int:
+        """更新客户端状态 - 原地更新，保留之前记录的心跳/注册时间戳，返回客户端行索引"""
+        idx = self._client_index.get(addr)
+        if idx is None:
+            idx = self._client_index[addr] = len(self._client_types)
+            self._client_types.append(client_type)
+            self._last_seen.append(now)
+            self._last_heartbeat.append(0.0)
+            self._last_registration.append(0.0)
+            self._registration_data.append(None)
+        else:
+            self._client_types[idx] = client_type
+            self._last_seen[idx] = now
         
         # 保留特定的时间戳字段
         if client_type == 'heartbeat':
-            client_info['last_heartbeat'] = current_time
+            self._last_heartbeat[idx] = now
         elif client_type == 'registration':
-            client_info['last_registration'] = current_time
+            self._last_registration[idx] = now
         
-        self.known_clients[addr] = client_info
+        return idx
     
     def get_client_status(self) -> Dict[str, Dict[str, Any]]:
         """获取客户端状态信息"""
-        current_time = asyncio.get_event_loop().time()
-        status = {}
-        
-        for addr, info in self.known_clients.items():
-            last_seen = info.get('last_seen', 0)
-            offline_duration = current_time - last_seen
-            
-            status[addr] = {
-                'type': info.get('type', 'unknown'),
-                'last_seen': last_seen,
-                'online': offline_duration < OFFLINE_THRESHOLD,
+        current_time = self._loop.time()
+        threshold = OFFLINE_THRESHOLD
+        client_types = self._client_types
+        last_seen = self._last_seen
+        
+        return {
+            addr: {
+                'type': client_types[idx],
+                'last_seen': last_seen[idx],
+                'online': (offline_duration := current_time - last_seen[idx]) < threshold,
                 'offline_duration': offline_duration
             }
-        
-        return status
+            for addr, idx in self._client_index.items()
+        }
 
 # ================== ModBus数据解析器 ==================
 
 class ModBusParser:
     """ModBus数据解析器 - 专门处理18B20温度传感器"""
     
-    def parse(self, data: bytes) -> Optional[str]:
-        """解析ModBus数据，返回JSON格式的温度数据"""
-        _LOGGER.debug(f"开始ModBus解析，数据长度: {len(data)}")
-        
-        if not self._is_valid_modbus(data):
+    __slots__ = ('_timestamp_second', '_timestamp_str')
+    
+    def __init__(self):
+        # 秒级时间戳缓存，同一秒内的数据包复用已格式化的字符串
+        self._timestamp_second = -1
+        self._timestamp_str = ""
+    
+    def parse(self, data: bytes) -> Optional[int]:
+        """解析ModBus数据，返回温度寄存器原始值"""
+        _LOGGER.debug("开始ModBus解析，数据长度: %d", len(data))
+        
+        # 后续校验与解析都基于同一个内存视图，切片不复制数据
+        mv = memoryview(data)
+        
+        # 常见固定长度帧走专用解析，偏移量已预先确定
+        fixed_parser = _FIXED_LENGTH_PARSERS.get(len(mv))
+        if fixed_parser is not None:
+            temp_raw = fixed_parser(mv)
+            if temp_raw is None:
+                _LOGGER.debug("ModBus格式验证失败 (固定长度 %d)", len(mv))
+            return temp_raw
+        
+        if not self._is_valid_modbus(mv):
             _LOGGER.debug("ModBus格式验证失败")
             return None
             
         try:
-            result = self._parse_modbus_response(data)
-            _LOGGER.debug(f"ModBus解析成功")
+            result = self._parse_modbus_response(mv)
+            _LOGGER.debug("ModBus解析成功")
             return result
         except Exception as e:
-            _LOGGER.error(f"ModBus数据解析失败: {e}")
-            _LOGGER.debug(f"失败的数据: hex={data.hex()}")
+            _LOGGER.error("ModBus数据解析失败: %s", e)
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("失败的数据: hex=%s", data.hex())
             return None
     
-    def _is_valid_modbus(self, data: bytes) -> bool:
+    def _is_valid_modbus(self, data: memoryview) -> bool:
         """验证ModBus数据包格式和CRC校验"""
-        _LOGGER.debug(f"验证ModBus格式...")
+        _LOGGER.debug("验证ModBus格式...")
         
         if len(data) < 5:
-            _LOGGER.debug(f"数据包太短: {len(data)} < 5")
+            _LOGGER.debug("数据包太短: %d < 5", len(data))
             return False
         
         device_addr, function_code = data[0], data[1]
-        _LOGGER.debug(f"设备地址: 0x{device_addr:02X} ({device_addr})")
-        _LOGGER.debug(f"功能码: 0x{function_code:02X} ({function_code})")
+        _LOGGER.debug("设备地址: 0x%02X (%d)", device_addr, device_addr)
+        _LOGGER.debug("功能码: 0x%02X (%d)", function_code, function_code)
         
         # 检查地址和功能码 - 只支持读取操作
         if not (MODBUS_DEVICE_ADDR_MIN <= device_addr <= MODBUS_DEVICE_ADDR_MAX):
-            _LOGGER.debug(f"设备地址超出范围: {device_addr} not in [{MODBUS_DEVICE_ADDR_MIN}, {MODBUS_DEVICE_ADDR_MAX}]")
+            _LOGGER.debug("设备地址超出范围: %d not in [%d, %d]", device_addr, MODBUS_DEVICE_ADDR_MIN, MODBUS_DEVICE_ADDR_MAX)
             return False
             
         if function_code != MODBUS_FUNCTION_CODE_READ:
-            _LOGGER.debug(f"不支持的功能码: 0x{function_code:02X}, 期望: 0x{MODBUS_FUNCTION_CODE_READ:02X}")
+            _LOGGER.debug("不支持的功能码: 0x%02X, 期望: 0x%02X", function_code, MODBUS_FUNCTION_CODE_READ)
+            return False
+        
+        # 检查帧长度是否与数据长度字节一致（3字节头部 + 数据 + 2字节CRC），不一致则无需计算CRC
+        data_length = data[2]
+        if len(data) != data_length + 5:
+            _LOGGER.debug("帧长度不一致: 实际=%d, 期望=%d (数据长度=%d)", len(data), data_length + 5, data_length)
             return False
         
         # 验证CRC校验
         if len(data) >= 4:
-            received_crc = int.from_bytes(data[-2:], 'little')
+            (received_crc,) = _U16_LE.unpack_from(data, len(data) - 2)
             calculated_crc = self._calculate_crc16(data[:-2])
             
-            _LOGGER.debug(f"CRC校验: 接收=0x{received_crc:04X}, 计算=0x{calculated_crc:04X}")
+            _LOGGER.debug("CRC校验: 接收=0x%04X, 计算=0x%04X", received_crc, calculated_crc)
             
             if received_crc != calculated_crc:
-                _LOGGER.debug(f"CRC校验失败")
+                _LOGGER.debug("CRC校验失败")
                 return False
             else:
-                _LOGGER.debug(f"CRC校验通过")
+                _LOGGER.debug("CRC校验通过")
         else:
             _LOGGER.debug("数据包长度不足，无法进行CRC校验")
             return False
@@ -672,11 +809,11 @@ class ModBusParser:
         _LOGGER.debug("ModBus格式验证通过")
         return True
     
-    def _parse_modbus_response(self, data: bytes) -> str:
+    def _parse_modbus_response(self, data: memoryview) -> int:
         """解析ModBus读寄存器响应"""
         device_addr, function_code, data_length = data[0], data[1], data[2]
         
-        _LOGGER.debug(f"解析ModBus响应: 设备=0x{device_addr:02X}, 功能码=0x{function_code:02X}, 数据长度={data_length}")
+        _LOGGER.debug("解析ModBus响应: 设备=0x%02X, 功能码=0x%02X, 数据长度=%d", device_addr, function_code, data_length)
         
         if function_code != MODBUS_FUNCTION_CODE_READ:
             raise ValueError(f"不支持的功能码: 0x{function_code:02X}")
@@ -688,59 +825,88 @@ class ModBusParser:
             raise ValueError(f"数据包长度不足: {len(data)} < {3 + data_length}")
         
         # 提取温度寄存器数据（前2字节）
-        register_data = data[3:5]
-        temp_raw = int.from_bytes(register_data, 'big')
+        (temp_raw,) = _U16_BE.unpack_from(data, 3)
         
-        _LOGGER.debug(f"提取温度数据: 寄存器={register_data.hex()}, 原始值=0x{temp_raw:04X} ({temp_raw})")
+        _LOGGER.debug("提取温度数据: 原始值=0x%04X (%d)", temp_raw, temp_raw)
         
-        return self._build_temperature_json(temp_raw)
+        return temp_raw
     
-    def _build_temperature_json(self, temp_raw: int) -> str:
-        """构建温度数据的JSON格式"""
-        _LOGGER.debug(f"构建温度JSON，原始值: 0x{temp_raw:04X} ({temp_raw})")
+    def build_temperature_data(self, temp_raw: int) -> Dict[str, Any]:
+        """由寄存器原始值构建温度数据字典"""
+        _LOGGER.debug("构建温度数据，原始值: 0x%04X (%d)", temp_raw, temp_raw)
         
         # 处理负温度的补码形式
         temp_signed = temp_raw - 65536 if temp_raw > 32767 else temp_raw
         temp_celsius = temp_signed / TEMPERATURE_SCALE
         temp_fahrenheit = temp_celsius * 9/5 + 32
         
-        _LOGGER.debug(f"温度转换: 有符号值={temp_signed}, 摄氏度={temp_celsius:.2f}, 华氏度={temp_fahrenheit:.2f}")
+        _LOGGER.debug("温度转换: 有符号值=%d, 摄氏度=%.2f, 华氏度=%.2f", temp_signed, temp_celsius, temp_fahrenheit)
         
         # 判断温度状态
         status = "normal" if TEMPERATURE_MIN <= temp_celsius <= TEMPERATURE_MAX else "error"
-        _LOGGER.debug(f"温度状态: {status} (范围: {TEMPERATURE_MIN}°C ~ {TEMPERATURE_MAX}°C)")
+        _LOGGER.debug("温度状态: %s (范围: %s°C ~ %s°C)", status, TEMPERATURE_MIN, TEMPERATURE_MAX)
         
         # 构建温度数据
         temp_data = {
-            "device_type": "18B20",
-            "temperature": {
-                "raw_value": temp_raw,
-                "signed_value": temp_signed,
-                "celsius": temp_celsius,
-                "fahrenheit": temp_fahrenheit,
-                "status": status
-            },
-            "timestamp": datetime.now().isoformat()
+            "raw_value": temp_raw,
+            "signed_value": temp_signed,
+            "celsius": temp_celsius,
+            "fahrenheit": temp_fahrenheit,
+            "status": status
         }
         
         # 添加错误信息（如果有）
         error_message = ERROR_CODES.get(temp_raw)
         if error_message:
-            temp_data["temperature"]["error_message"] = error_message
-            temp_data["temperature"]["status"] = "error"
-            _LOGGER.warning(f"温度传感器错误: 0x{temp_raw:04X} -> {error_message}")
+            temp_data["error_message"] = error_message
+            temp_data["status"] = "error"
+            _LOGGER.warning("温度传感器错误: 0x%04X -> %s", temp_raw, error_message)
         
-        result_json = json.dumps(temp_data)
-        _LOGGER.debug(f"生成温度JSON: {result_json}")
+        _LOGGER.debug("生成温度数据: %s", temp_data)
         
-        return result_json
+        return temp_data
     
-    def _calculate_crc16(self, data: bytes) -> int:
-        """计算ModBus CRC16校验码"""
+    def get_timestamp(self) -> str:
+        """获取秒级精度的ISO格式时间戳"""
+        second = int(time.time())
+        if second != self._timestamp_second:
+            self._timestamp_second = second
+            self._timestamp_str = datetime.fromtimestamp(second).isoformat()
+        return self._timestamp_str
+    
+    @staticmethod
+    def _calculate_crc16(data: Union[bytes, memoryview]) -> int:
+        """计算ModBus CRC16校验码（查表法）"""
+        table = _CRC16_TABLE
         crc = 0xFFFF
         for byte in data:
-            crc ^= byte
-            for _ in range(8):
-                crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+            crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
         return crc
 
+# 帧头解码器 - 设备地址、功能码、数据长度与首个寄存器，一次调用解出
+_FRAME_HEADER = struct.Struct('>BBBH')
+
+def _make_fixed_length_parser(length: int) -> Callable[[memoryview], Optional[int]]:
+    """为指定帧长度生成专用解析函数，校验通过返回温度寄存器原始值，否则返回None"""
+    data_length = length - 5
+    crc_offset = length - 2
+    unpack_header = _FRAME_HEADER.unpack_from
+    unpack_crc = _U16_LE.unpack_from
+    calculate_crc16 = ModBusParser._calculate_crc16
+    
+    def parse(data: memoryview) -> Optional[int]:
+        device_addr, function_code, length_byte, temp_raw = unpack_header(data)
+        if (MODBUS_DEVICE_ADDR_MIN <= device_addr <= MODBUS_DEVICE_ADDR_MAX
+                and function_code == MODBUS_FUNCTION_CODE_READ
+                and length_byte == data_length
+                and unpack_crc(data, crc_offset)[0] == calculate_crc16(data[:crc_offset])):
+            return temp_raw
+        return None
+    
+    return parse
+
+# 固定长度帧解析器：读取1、2、4个寄存器的响应 (7、9、13字节)
+_FIXED_LENGTH_PARSERS: Dict[int, Callable[[memoryview], Optional[int]]] = {
+    length: _make_fixed_length_parser(length)
+    for length in (7, 9, MODBUS_EXPECTED_LENGTH)
+}
@@ -3,7 +3,7 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 import logging
 
-from .const import DOMAIN, DEFAULT_CONFIG
+from .const import DOMAIN, DEFAULT_CONFIG, UDP_SOCKET_RCVBUF_MIN, UDP_SOCKET_RCVBUF_MAX
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,10 +43,48 @@ class TempUDPConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     vol.Coerce(int), 
                     vol.Range(min=1, max=65535)
                 ),
+                vol.Optional("receive_buffer", default=DEFAULT_CONFIG["receive_buffer"]): vol.All(
+                    vol.Coerce(int),
+                    vol.Range(min=UDP_SOCKET_RCVBUF_MIN, max=UDP_SOCKET_RCVBUF_MAX)
+                ),
             }),
             errors=errors,
             description_placeholders={
                 "port_info": f"UDP服务器监听端口，默认{DEFAULT_CONFIG['port']}"
             }
         )
+    
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """返回选项流程 - 已创建的条目可调整接收缓冲区"""
+        return TempUDPOptionsFlow(config_entry)
+
+class TempUDPOptionsFlow(config_entries.OptionsFlow):
+    """Temperature UDP Receiver 选项流程"""
+    
+    def __init__(self, config_entry):
+        self._entry = config_entry
+    
+    async def async_step_init(self, user_input=None):
+        """处理选项步骤"""
+        if user_input is not None:
+            _LOGGER.info(f"更新Temperature UDP Receiver选项: {user_input}")
+            return self.async_create_entry(title="", data=user_input)
+        
+        # 选项优先，未设置时沿用创建条目时的配置
+        current = self._entry.options.get(
+            "receive_buffer",
+            self._entry.data.get("receive_buffer", DEFAULT_CONFIG["receive_buffer"])
+        )
+        
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Optional("receive_buffer", default=current): vol.All(
+                    vol.Coerce(int),
+                    vol.Range(min=UDP_SOCKET_RCVBUF_MIN, max=UDP_SOCKET_RCVBUF_MAX)
+                ),
+            }),
+        )
 
@@ -3,6 +3,11 @@
 # 集成域名
 DOMAIN = "temp_udp_receiver"
 
+# 总线事件名称 - 心跳、注册事件共用
+EVENT_NAME = f"{DOMAIN}_event"
+# 温度数据专用事件名称 - 由事件总线按类型过滤，监听方无需再检查 event_type
+EVENT_TEMPERATURE_DATA = f"{DOMAIN}_temperature_data"
+
 # 平台列表
 PLATFORMS = ["sensor"]
 
@@ -12,8 +17,18 @@ MODBUS_DEVICE_ADDR_MAX = 247
 MODBUS_FUNCTION_CODE_READ = 0x03  # 读保持寄存器
 MODBUS_EXPECTED_LENGTH = 13  # 3字节头部 + 8字节数据 + 2字节CRC
 
+# UDP接收配置
+UDP_RECV_BUFFER_SIZE = 65535  # 单个数据报最大长度 (字节)
+UDP_MAX_DATAGRAMS_PER_READ = 32  # 每次套接字可读时最多读取的数据报数量，避免阻塞事件循环
+UDP_SOCKET_RCVBUF = 4 * 1024 * 1024  # 内核接收缓冲区大小 (字节)，防止大量设备同时上报时丢包
+UDP_SOCKET_RCVBUF_MIN = 64 * 1024  # 可配置的接收缓冲区最小值 (字节)
+UDP_SOCKET_RCVBUF_MAX = 64 * 1024 * 1024  # 可配置的接收缓冲区最大值 (字节)
+PENDING_MAX_PER_FLUSH = 32  # 每轮事件循环最多处理的已解析数据包数量，其余留到下一轮
+UNKNOWN_PACKET_LOG_LIMIT = 10  # 每秒最多记录的未知数据包数量，防止垃圾流量刷屏
+
 # 客户端状态配置
 OFFLINE_THRESHOLD = 10  # 10s离线阈值 (秒)
+STATUS_CHECK_INTERVAL = 5  # 设备状态离线检查间隔 (秒)
 
 # 温度数据转换配置
 TEMPERATURE_SCALE = 10.0  # 温度除数因子（温度值需要除以10）
@@ -37,5 +52,6 @@ REGISTRATION_INDICATORS = [
 
 # 默认配置
 DEFAULT_CONFIG = {
-    'port': 8889
+    'port': 8889,
+    'receive_buffer': UDP_SOCKET_RCVBUF
 } 
\ No newline at end of file
@@ -1,21 +1,31 @@
 from homeassistant.components.sensor import SensorEntity, SensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.const import UnitOfTemperature
 from homeassistant.util import dt as dt_util
 import logging
-import asyncio
+from datetime import timedelta
 from typing import Dict, Any, Optional, Union
 
 from .const import (
-    DOMAIN, TEMPERATURE_SCALE, TEMPERATURE_MIN, TEMPERATURE_MAX, ERROR_CODES
+    DOMAIN, EVENT_NAME, EVENT_TEMPERATURE_DATA, TEMPERATURE_SCALE, TEMPERATURE_MIN, TEMPERATURE_MAX, ERROR_CODES,
+    STATUS_CHECK_INTERVAL
 )
 
 _LOGGER = logging.getLogger(__name__)
 
+# 有效温度范围描述 - 导入时构建一次
+_VALID_RANGE_STR = f"{TEMPERATURE_MIN}°C ~ {TEMPERATURE_MAX}°C"
+
 # ================== 传感器设置 ==================
 
+# 实体内部分发信号 - 按配置条目区分，实体添加到 Home Assistant 后才连接
+_SIGNAL_TEMPERATURE_DATA = f"{DOMAIN}_temperature_data_{{}}"
+_SIGNAL_DEVICE_ACTIVITY = f"{DOMAIN}_device_activity_{{}}"
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry, 
@@ -27,70 +37,112 @@ async def async_setup_entry(
             TemperatureSensor(hass, entry.entry_id),        # 温度传感器（摄氏度）
             TemperatureFSensor(hass, entry.entry_id),       # 温度传感器（华氏度）
             RawValueSensor(hass, entry.entry_id),           # 原始数值传感器
-            DeviceStatusSensor(hass, entry.entry_id),       # 设备状态传感器
             LastUpdateSensor(hass, entry.entry_id),         # 最后更新传感器
+            DeviceStatusSensor(hass, entry.entry_id),       # 设备状态传感器
         ]
         
-        async_add_entities(sensors, True)
+        # 每个配置条目只注册一个总线监听器，再通过分发信号转给已添加的实体；
+        # 被禁用或已移除的实体不会连接信号，也就不会收到更新
+        entry.async_on_unload(
+            hass.bus.async_listen(EVENT_TEMPERATURE_DATA, _make_event_dispatcher(hass, entry.entry_id))
+        )
+        entry.async_on_unload(
+            hass.bus.async_listen(EVENT_NAME, _make_activity_listener(hass, entry.entry_id))
+        )
+        
+        async_add_entities(sensors)
         _LOGGER.info(f"已创建 {len(sensors)} 个温度传感器实体")
         
     except Exception as e:
         _LOGGER.error(f"设置传感器实体失败: {e}")
 
+def _make_event_dispatcher(hass: HomeAssistant, entry_id: str):
+    """创建温度事件分发回调 - 刷新设备状态后把温度数据分发给已注册的传感器"""
+    temp_signal = _SIGNAL_TEMPERATURE_DATA.format(entry_id)
+    activity_signal = _SIGNAL_DEVICE_ACTIVITY.format(entry_id)
+    
+    @callback
+    def dispatch_event(event):
+        # 分发器会分别捕获并记录每个实体回调的异常，单个传感器出错不影响其他传感器
+        async_dispatcher_send(hass, activity_signal)
+        async_dispatcher_send(hass, temp_signal, event.data.get('temperature_data', {}))
+    
+    return dispatch_event
+
+def _make_activity_listener(hass: HomeAssistant, entry_id: str):
+    """创建心跳/注册事件回调 - 只刷新设备状态"""
+    activity_signal = _SIGNAL_DEVICE_ACTIVITY.format(entry_id)
+    
+    @callback
+    def handle_event(event):
+        async_dispatcher_send(hass, activity_signal)
+    
+    return handle_event
+
 # ================== 基础传感器类 ==================
 
 class BaseTempSensor(SensorEntity):
     """温度传感器基类"""
     
+    # 对应的温度数据字段，子类设置
+    _DATA_KEY: Optional[str] = None
+    
     def __init__(self, hass: HomeAssistant, entry_id: str, sensor_type: str, 
                  name: str, unique_id: str, icon: str = "mdi:thermometer"):
-        self.hass = hass
         self.entry_id = entry_id
         self.sensor_type = sensor_type
         self._attr_name = name
         self._attr_unique_id = f"{DOMAIN}_{unique_id}_{entry_id}"
         self._attr_icon = icon
         self._attr_native_value = None
+        self._attr_extra_state_attributes = {}
         self._attr_should_poll = False
-        
+    
     async def async_added_to_hass(self) -> None:
-        """注册事件监听"""
-        await super().async_added_to_hass()
-        
-        @callback
-        def handle_temp_event(event):
-            try:
-                if not self.entity_id:
-                    _LOGGER.debug(f"{self.sensor_type}传感器实体ID尚未设置，跳过更新")
-                    return
-                
-                if event.data.get('event_type') == 'temperature_data_received':
-                    self._handle_temp_data(event.data.get('temperature_data', {}))
-                    
-            except Exception as e:
-                _LOGGER.error(f"{self.sensor_type}传感器事件处理失败: {e}")
-        
+        """添加到 Home Assistant 后连接温度数据信号，移除时自动断开"""
         self.async_on_remove(
-            self.hass.bus.async_listen(f'{DOMAIN}_event', handle_temp_event)
+            async_dispatcher_connect(
+                self.hass, _SIGNAL_TEMPERATURE_DATA.format(self.entry_id), self.handle_temp_data
+            )
         )
     
-    def _handle_temp_data(self, temp_data: Dict[str, Any]) -> None:
-        """处理温度数据 - 子类需要重写此方法"""
-        raise NotImplementedError("子类必须实现 _handle_temp_data 方法")
+    @callback
+    def handle_temp_data(self, temp_data: Dict[str, Any]) -> None:
+        """处理温度数据 - 按字段取值更新状态，子类按需重写"""
+        value = temp_data.get(self._DATA_KEY)
+        if value is not None:
+            self._update_state(value, temp_data)
+    
+    def _build_attributes(self, value: Union[int, float, str], temp_data: Dict[str, Any]) -> Dict[str, Any]:
+        """根据新数值和本次温度数据构建额外状态属性 - 子类按需重写"""
+        return {}
     
-    def _update_state(self, value: Union[int, float, str], log_message: str = "") -> None:
-        """更新传感器状态"""
+    def _update_state(self, value: Union[int, float, str], temp_data: Dict[str, Any]) -> None:
+        """更新传感器状态 - 数值未变化且未强制更新时跳过状态写入"""
+        if value == self._attr_native_value and not self.force_update:
+            return
+        
         self._attr_native_value = value
+        # 属性只在数值变化时计算一次，读取时直接返回缓存
+        self._attr_extra_state_attributes = self._build_attributes(value, temp_data)
         self.async_write_ha_state()
         
-        if log_message:
-            _LOGGER.info(f"{self.sensor_type}: {log_message}")
+        # 惰性格式化，日志级别高于 INFO 时不产生字符串开销
+        _LOGGER.info("%s: 更新为 %s", self.sensor_type, value)
 
 # ================== 温度传感器实体 ==================
 
 class TemperatureSensor(BaseTempSensor):
     """温度传感器（摄氏度）"""
     
+    _DATA_KEY = 'celsius'
+    
+    # 常量属性，每次更新时合并进动态属性
+    _STATIC_ATTRS = {
+        "valid_range": _VALID_RANGE_STR,
+        "description": "DS18B20温度传感器数据"
+    }
+    
     def __init__(self, hass: HomeAssistant, entry_id: str):
         super().__init__(
             hass, entry_id, "温度", "Temp UDP Temperature", "temp_udp_temperature", "mdi:thermometer"
@@ -99,19 +151,12 @@ class TemperatureSensor(BaseTempSensor):
         self._attr_device_class = SensorDeviceClass.TEMPERATURE
         self._attr_suggested_unit_of_measurement = UnitOfTemperature.CELSIUS
         
-    def _handle_temp_data(self, temp_data: Dict[str, Any]) -> None:
-        if 'celsius' in temp_data:
-            temp_celsius = temp_data['celsius']
-            status = temp_data.get('status', 'unknown')
-            self._update_state(temp_celsius, f"温度更新为 {temp_celsius:.1f}°C, 状态: {status}")
-    
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        if self._attr_native_value is None:
-            return {}
-            
-        temp_c = self._attr_native_value
-        temp_f = temp_c * 9/5 + 32
+    def _build_attributes(self, value: float, temp_data: Dict[str, Any]) -> Dict[str, Any]:
+        temp_c = value
+        # 华氏度已由数据源换算，无需重复计算
+        temp_f = temp_data.get('fahrenheit')
+        if temp_f is None:
+            temp_f = temp_c * 9/5 + 32
         
         # 判断温度状态
         is_normal = TEMPERATURE_MIN <= temp_c <= TEMPERATURE_MAX
@@ -123,13 +168,14 @@ class TemperatureSensor(BaseTempSensor):
             "temperature_fahrenheit": round(temp_f, 2),
             "temperature_status": temp_status,
             "temperature_level": temp_level,
-            "valid_range": f"{TEMPERATURE_MIN}°C ~ {TEMPERATURE_MAX}°C",
-            "description": "DS18B20温度传感器数据"
+            **self._STATIC_ATTRS
         }
 
 class TemperatureFSensor(BaseTempSensor):
     """温度传感器（华氏度）"""
     
+    _DATA_KEY = 'fahrenheit'
+    
     def __init__(self, hass: HomeAssistant, entry_id: str):
         super().__init__(
             hass, entry_id, "温度(华氏)", "Temp UDP Temperature F", "temp_udp_temperature_f", "mdi:thermometer"
@@ -138,19 +184,12 @@ class TemperatureFSensor(BaseTempSensor):
         self._attr_device_class = SensorDeviceClass.TEMPERATURE
         self._attr_suggested_unit_of_measurement = UnitOfTemperature.FAHRENHEIT
         
-    def _handle_temp_data(self, temp_data: Dict[str, Any]) -> None:
-        if 'fahrenheit' in temp_data:
-            temp_fahrenheit = temp_data['fahrenheit']
-            status = temp_data.get('status', 'unknown')
-            self._update_state(temp_fahrenheit, f"温度更新为 {temp_fahrenheit:.1f}°F, 状态: {status}")
-    
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        if self._attr_native_value is None:
-            return {}
-            
-        temp_f = self._attr_native_value
-        temp_c = (temp_f - 32) * 5/9
+    def _build_attributes(self, value: float, temp_data: Dict[str, Any]) -> Dict[str, Any]:
+        temp_f = value
+        # 摄氏度已由数据源换算，无需重复计算
+        temp_c = temp_data.get('celsius')
+        if temp_c is None:
+            temp_c = (temp_f - 32) * 5/9
         
         return {
             "temperature_fahrenheit": temp_f,
@@ -161,24 +200,19 @@ class TemperatureFSensor(BaseTempSensor):
 class RawValueSensor(BaseTempSensor):
     """原始数值传感器"""
     
+    _DATA_KEY = 'raw_value'
+    
     def __init__(self, hass: HomeAssistant, entry_id: str):
         super().__init__(
             hass, entry_id, "原始数值", "Temp UDP Raw Value", "temp_udp_raw_value", "mdi:numeric"
         )
         
-    def _handle_temp_data(self, temp_data: Dict[str, Any]) -> None:
-        if 'raw_value' in temp_data:
-            raw_value = temp_data['raw_value']
-            signed_value = temp_data.get('signed_value', raw_value)
-            self._update_state(raw_value, f"原始数值更新为 {raw_value} (有符号: {signed_value})")
-    
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        if self._attr_native_value is None:
-            return {}
-            
-        raw_val = self._attr_native_value
-        signed_val = raw_val - 65536 if raw_val > 32767 else raw_val
+    def _build_attributes(self, value: int, temp_data: Dict[str, Any]) -> Dict[str, Any]:
+        raw_val = value
+        # 有符号值已由数据源计算；缺失时用无分支方式转换 16 位补码
+        signed_val = temp_data.get('signed_value')
+        if signed_val is None:
+            signed_val = raw_val - ((raw_val >> 15) << 16)
         
         return {
             "raw_value": raw_val,
@@ -196,68 +230,88 @@ class DeviceStatusSensor(SensorEntity):
     """设备状态传感器"""
     
     def __init__(self, hass: HomeAssistant, entry_id: str):
-        self.hass = hass
         self.entry_id = entry_id
         self._attr_name = "Temp UDP Device Status"
         self._attr_unique_id = f"{DOMAIN}_temp_udp_device_status_{entry_id}"
         self._attr_native_value = "等待连接"
-        self._attr_should_poll = True
+        self._attr_should_poll = False  # 事件推送 + 定时离线检查，无需轮询
         self._attr_icon = "mdi:connection"
-        self._last_activity = None
+        self._last_activity = None  # 单调时钟，用于离线计算
+        self._last_activity_utc = None  # 墙上时钟，用于 last_activity 属性
         self._offline_threshold = 10  # 离线阈值（秒）
+        self._offline_threshold_minutes = self._offline_threshold // 60
+        self._loop = hass.loop  # 缓存事件循环引用，避免每次调用 get_event_loop
+        self._refresh_attributes()
         
     async def async_added_to_hass(self) -> None:
-        """注册事件监听"""
-        @callback
-        def update_activity(event):
-            try:
-                self._last_activity = asyncio.get_event_loop().time()
-                self._update_status_immediate()
-            except Exception as e:
-                _LOGGER.error(f"设备状态更新失败: {e}")
-        
+        """添加到 Home Assistant 后连接设备活动信号并定时检查离线状态"""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, _SIGNAL_DEVICE_ACTIVITY.format(self.entry_id), self.handle_activity
+            )
+        )
         self.async_on_remove(
-            self.hass.bus.async_listen(f'{DOMAIN}_event', update_activity)
+            async_track_time_interval(
+                self.hass, self._async_check_status, timedelta(seconds=STATUS_CHECK_INTERVAL)
+            )
         )
         
+    @callback
+    def _async_check_status(self, now=None) -> None:
+        """定时回调 - 重新计算设备状态"""
+        self._update_status()
+        
+    @callback
+    def handle_activity(self) -> None:
+        """收到任意设备事件时记录活动时间"""
+        self._last_activity = self._loop.time()
+        self._last_activity_utc = dt_util.utcnow()
+        self._update_status_immediate()
+        
     def _update_status_immediate(self) -> None:
-        """立即更新状态为在线"""
+        """立即更新状态为在线 - 已在线时无需重复写入"""
+        if self._attr_native_value == "在线":
+            return
+        
         self._attr_native_value = "在线"
         self._attr_icon = "mdi:check-network"
+        self._refresh_attributes()
         self.async_write_ha_state()
         _LOGGER.debug("设备状态更新为: 在线")
         
-    async def async_update(self) -> None:
-        """定期检查离线状态"""
-        self._update_status()
-        
     def _update_status(self) -> None:
-        """更新设备状态"""
+        """更新设备状态 - 状态文本未变化时跳过写入"""
         try:
             if self._last_activity is None:
-                self._attr_native_value = "等待连接"
-                self._attr_icon = "mdi:connection"
+                status = "等待连接"
+                icon = "mdi:connection"
             else:
-                current_time = asyncio.get_event_loop().time()
+                current_time = self._loop.time()
                 offline_duration = current_time - self._last_activity
                 
                 if offline_duration < self._offline_threshold:
-                    self._attr_native_value = "在线"
-                    self._attr_icon = "mdi:check-network"
+                    status = "在线"
+                    icon = "mdi:check-network"
                 else:
                     minutes_offline = int(offline_duration // 60)
-                    self._attr_native_value = f"离线 {minutes_offline}分钟"
-                    self._attr_icon = "mdi:network-off"
+                    status = f"离线 {minutes_offline}分钟"
+                    icon = "mdi:network-off"
+            
+            if status == self._attr_native_value:
+                return
             
+            self._attr_native_value = status
+            self._attr_icon = icon
+            self._refresh_attributes()
             self.async_write_ha_state()
+            _LOGGER.debug("设备状态更新为: %s", status)
         except Exception as e:
             _LOGGER.error(f"状态更新失败: {e}")
         
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """返回额外状态属性"""
+    def _refresh_attributes(self) -> None:
+        """在写入状态前计算额外状态属性 - 只包含状态变化时才会变化的字段"""
         base_attrs = {
-            "offline_threshold_minutes": self._offline_threshold // 60,
+            "offline_threshold_minutes": self._offline_threshold_minutes,
             "device_type": "18B20温度传感器"
         }
         
@@ -268,44 +322,46 @@ class DeviceStatusSensor(SensorEntity):
             })
         else:
             try:
-                current_time = asyncio.get_event_loop().time()
-                offline_duration = current_time - self._last_activity
-                last_activity_dt = dt_util.utc_from_timestamp(self._last_activity).astimezone(dt_util.DEFAULT_TIME_ZONE)
+                offline_duration = self._loop.time() - self._last_activity
+                last_activity_dt = dt_util.as_local(self._last_activity_utc)
                 is_online = offline_duration < self._offline_threshold
                 
                 base_attrs.update({
                     "last_activity": last_activity_dt.strftime("%Y-%m-%d %H:%M:%S"),
-                    "offline_duration_seconds": int(offline_duration),
                     "is_online": is_online,
                     "status": "在线" if is_online else "离线"
                 })
             except Exception as e:
                 _LOGGER.error(f"获取状态属性失败: {e}")
                 
-        return base_attrs
+        self._attr_extra_state_attributes = base_attrs
 
 class LastUpdateSensor(BaseTempSensor):
     """最后更新时间传感器"""
     
+    # 属性全部为常量，所有实例共用同一字典
+    _STATIC_ATTRS = {
+        "update_source": "18B20温度传感器",
+        "update_protocol": "ModBus-RTU over UDP",
+        "description": "最后一次接收到温度数据的时间"
+    }
+    
     def __init__(self, hass: HomeAssistant, entry_id: str):
         super().__init__(
             hass, entry_id, "最后更新", "Temp UDP Last Update", "temp_udp_last_update", "mdi:clock-outline"
         )
         self._attr_native_value = "从未更新"
         self._attr_state_class = None
-        self._attr_force_update = True
+        self._attr_extra_state_attributes = self._STATIC_ATTRS
         
-    def _handle_temp_data(self, temp_data: Dict[str, Any]) -> None:
+    @callback
+    def handle_temp_data(self, temp_data: Dict[str, Any]) -> None:
         """处理更新时间"""
-        current_time = dt_util.now().strftime("%Y-%m-%d %H:%M:%S")
-        self._update_state(current_time, f"温度数据更新时间: {current_time}")
+        # isoformat 比 strftime 快，截掉时区后缀后与原格式 "%Y-%m-%d %H:%M:%S" 一致
+        current_time = dt_util.now().isoformat(" ", "seconds")[:19]
+        self._update_state(current_time, temp_data)
     
-    @property
-    def extra_state_attributes(self) -> Dict[str, Any]:
-        """返回额外状态属性"""
-        return {
-            "update_source": "18B20温度传感器",
-            "update_protocol": "ModBus-RTU over UDP",
-            "description": "最后一次接收到温度数据的时间"
-        }
+    def _build_attributes(self, value, temp_data: Dict[str, Any]) -> Dict[str, Any]:
+        """属性为常量，直接返回类级字典"""
+        return self._STATIC_ATTRS
 